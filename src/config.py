@@ -9,9 +9,18 @@ import logging
 import yaml
 
 _LOGGER = logging.getLogger(__name__)
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# A None default means "use the category limit".
+_CATEGORY_FIELDS: tuple[tuple[str, type, Any, str], ...] = (
+    ("fresh_hours", int, 36, "invalid 'fresh_hours' (must be positive int)"),
+    ("max_per_source", int, None, "invalid 'max_per_source' (must be positive int)"),
+    ("require_keywords", bool, False, "invalid 'require_keywords' (must be boolean)"),
+)
+
 
 def _load_yaml(path: Path) -> dict[str, Any]:
-    data = yaml.safe_load(path.read_text(encoding="utf-8"))
+    data = yaml.load(path.read_text(encoding="utf-8"), Loader=_YAML_LOADER)
     if not isinstance(data, dict):
         raise ValueError(f"{path.name} must contain a mapping at the top level")
     return data
@@ -21,6 +30,17 @@ def _warn_invalid(category: str, reason: str) -> None:
     _LOGGER.warning("Skipping category '%s': %s", category, reason)
 
 
+def _category_fields(key: str, value: dict[str, Any], limit: int) -> dict[str, Any] | None:
+    fields: dict[str, Any] = {"limit": limit}
+    for name, expected, default, reason in _CATEGORY_FIELDS:
+        field_value = value.get(name, limit if default is None else default)
+        if not isinstance(field_value, expected) or (expected is int and field_value <= 0):
+            _warn_invalid(key, reason)
+            return None
+        fields[name] = field_value
+    return fields
+
+
 def load_config(sources_path: Path, keywords_path: Path | None = None) -> dict[str, Any]:
     raw = _load_yaml(sources_path)
     categories = raw.get("categories")
@@ -33,21 +53,12 @@ def load_config(sources_path: Path, keywords_path: Path | None = None) -> dict[s
             _warn_invalid(key, "category entry must be a mapping")
             continue
         limit = value.get("limit")
-        fresh_hours = value.get("fresh_hours", 36)
-        max_per_source = value.get("max_per_source", limit)
-        require_keywords = value.get("require_keywords", False)
         sources = value.get("sources")
         if not isinstance(limit, int) or not isinstance(sources, list):
             _warn_invalid(key, "missing or invalid 'limit' or 'sources'")
             continue
-        if not isinstance(fresh_hours, int) or fresh_hours <= 0:
-            _warn_invalid(key, "invalid 'fresh_hours' (must be positive int)")
-            continue
-        if not isinstance(max_per_source, int) or max_per_source <= 0:
-            _warn_invalid(key, "invalid 'max_per_source' (must be positive int)")
-            continue
-        if not isinstance(require_keywords, bool):
-            _warn_invalid(key, "invalid 'require_keywords' (must be boolean)")
+        fields = _category_fields(key, value, limit)
+        if fields is None:
             continue
         valid_sources = []
         for source in sources:
@@ -63,10 +74,7 @@ def load_config(sources_path: Path, keywords_path: Path | None = None) -> dict[s
             _warn_invalid(key, "no valid RSS sources found")
             continue
         config["categories"][key] = {
-            "limit": limit,
-            "fresh_hours": fresh_hours,
-            "max_per_source": max_per_source,
-            "require_keywords": require_keywords,
+            **fields,
             "sources": valid_sources,
             "keywords": [],
         }
@@ -2,36 +2,28 @@
 
 from __future__ import annotations
 
-import re
 import string
-from datetime import datetime
-from typing import Any
+from functools import lru_cache
+from typing import Iterable
+
+from .models import Item
 
 _PUNCTUATION_TABLE = str.maketrans({ch: " " for ch in string.punctuation})
 
 
+@lru_cache(maxsize=8192)
 def normalize_title(title: str) -> str:
-    cleaned = title.lower().translate(_PUNCTUATION_TABLE)
-    cleaned = re.sub(r"\s+", " ", cleaned).strip()
-    return cleaned
+    return " ".join(title.lower().translate(_PUNCTUATION_TABLE).split())
 
 
-def _is_newer(left: dict[str, Any], right: dict[str, Any]) -> bool:
-    left_dt = left.get("published")
-    right_dt = right.get("published")
-    if isinstance(left_dt, datetime) and isinstance(right_dt, datetime):
-        return left_dt > right_dt
-    if isinstance(left_dt, datetime):
-        return True
-    if isinstance(right_dt, datetime):
-        return False
-    return False
+def _is_newer(left: Item, right: Item) -> bool:
+    return (left.has_date, left.sort_ts) > (right.has_date, right.sort_ts)
 
 
-def dedupe_items(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
-    deduped: dict[str, dict[str, Any]] = {}
+def dedupe_items(items: Iterable[Item]) -> list[Item]:
+    deduped: dict[str, Item] = {}
     for item in items:
-        key = normalize_title(item.get("title", ""))
+        key = normalize_title(item.title)
         if not key:
             continue
         existing = deduped.get(key)
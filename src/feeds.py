@@ -4,24 +4,43 @@ from __future__ import annotations
 
 import calendar
 import html
+import json
 import logging
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Any
+from pathlib import Path
+from typing import Any, Iterable, Iterator
 
 import feedparser
+import requests
+from requests.adapters import HTTPAdapter
 
-_TAG_RE = re.compile(r"<[^>]+>")
+from .models import Item
+
+_CLEAN_RE = re.compile(r"(?:<[^>]+>|\s)+")
+_MAX_FEED_WORKERS = 8
+_USER_AGENT = "NewsDiet/1.0"
+_FETCH_TIMEOUT = 10
 _LOGGER = logging.getLogger(__name__)
 
+_SESSION = requests.Session()
+_SESSION.headers.update({"User-Agent": _USER_AGENT, "Accept-Encoding": "gzip, deflate"})
+_SESSION.mount("http://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
+_SESSION.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
+
 
 def _strip_html(value: str) -> str:
     if not value:
         return ""
-    text = _TAG_RE.sub(" ", value)
-    text = html.unescape(text)
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
+    if "<" not in value and "&" not in value:
+        return " ".join(value.split())
+    text = _CLEAN_RE.sub(" ", value)
+    if "&" in text:
+        # Entities such as &nbsp; can decode to whitespace, so collapse again.
+        text = " ".join(html.unescape(text).split())
+    return text.strip()
 
 
 def _parse_datetime(entry: dict[str, Any]) -> datetime | None:
@@ -39,25 +58,147 @@ def _normalize_entry(
     entry: dict[str, Any],
     source_name: str | None,
     category: str,
-) -> dict[str, Any]:
-    title = _strip_html((entry.get("title") or "").strip())
-    teaser = _strip_html((entry.get("summary") or entry.get("description") or "").strip())
+) -> Item:
+    title = _strip_html(entry.get("title") or "")
+    teaser = _strip_html(entry.get("summary") or entry.get("description") or "")
     link = (entry.get("link") or "").strip()
     published = _parse_datetime(entry)
-    return {
-        "title": title,
-        "teaser": teaser,
-        "link": link,
-        "published": published,
-        "source": source_name,
-        "category": category,
-    }
+    return Item(
+        title=title,
+        teaser=teaser,
+        link=link,
+        published=published,
+        source=source_name,
+        category=category,
+    )
+
+
+def _iter_items(
+    entries: Iterable[dict[str, Any]],
+    source_name: str | None,
+    category: str,
+) -> Iterator[Item]:
+    for entry in entries:
+        item = _normalize_entry(entry, source_name, category)
+        if item.title and item.link:
+            yield item
+
+
+def load_feed_cache(path: Path) -> dict[str, dict[str, Any]]:
+    if not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, UnicodeDecodeError, json.JSONDecodeError) as exc:
+        _LOGGER.warning("Ignoring feed cache: %s", exc)
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    cache: dict[str, dict[str, Any]] = {}
+    for url, entry in data.items():
+        if not isinstance(entry, dict) or not isinstance(entry.get("entries"), list):
+            continue
+        etag = entry.get("etag")
+        modified = entry.get("modified")
+        cache[url] = {
+            "etag": etag if isinstance(etag, str) else None,
+            "modified": modified if isinstance(modified, str) else None,
+            "entries": entry["entries"],
+        }
+    return cache
+
+
+def save_feed_cache(path: Path, cache: dict[str, dict[str, Any]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    tmp_path.write_text(json.dumps(cache), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def _cache_record(
+    etag: str | None, modified: str | None, items: list[Item]
+) -> dict[str, Any] | None:
+    if not etag and not modified:
+        return None
+    entries = [
+        {
+            "title": item.title,
+            "teaser": item.teaser,
+            "link": item.link,
+            "published": item.published.isoformat() if item.published else None,
+        }
+        for item in items
+    ]
+    return {"etag": etag, "modified": modified, "entries": entries}
+
+
+def _items_from_cache(
+    record: dict[str, Any],
+    source_name: str | None,
+    category: str,
+) -> list[Item]:
+    items: list[Item] = []
+    for entry in record["entries"]:
+        if not isinstance(entry, dict):
+            continue
+        title = entry.get("title")
+        link = entry.get("link")
+        teaser = entry.get("teaser")
+        if not isinstance(title, str) or not isinstance(link, str) or not title or not link:
+            continue
+        published = entry.get("published")
+        try:
+            published_dt = datetime.fromisoformat(published) if published else None
+        except (TypeError, ValueError):
+            published_dt = None
+        items.append(
+            Item(
+                title=title,
+                teaser=teaser if isinstance(teaser, str) else "",
+                link=link,
+                published=published_dt,
+                source=source_name,
+                category=category,
+            )
+        )
+    return items
+
+
+def _fetch_feed(
+    url: str, cached: dict[str, Any] | None
+) -> tuple[Any | None, str | None, str | None]:
+    headers: dict[str, str] = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("modified"):
+            headers["If-Modified-Since"] = cached["modified"]
+    response = _SESSION.get(url, headers=headers, timeout=_FETCH_TIMEOUT)
+    etag = response.headers.get("ETag")
+    modified = response.headers.get("Last-Modified")
+    if response.status_code == 304:
+        return None, etag, modified
+    response.raise_for_status()
+    parsed = feedparser.parse(
+        response.content,
+        # feedparser looks headers up by lowercase name (e.g. for the charset).
+        response_headers={
+            **{key.lower(): value for key, value in response.headers.items()},
+            # Base URL for relative entry links, as parse(url) used to provide.
+            "content-location": response.url,
+        },
+        # The sanitizer also drops <script>/<style> bodies, which _strip_html keeps.
+        resolve_relative_uris=False,
+    )
+    return parsed, etag, modified
 
 
 def fetch_category_items(
-    category: str, cfg: dict[str, Any]
-) -> tuple[list[dict[str, Any]], dict[str, int]]:
-    items: list[dict[str, Any]] = []
+    category: str,
+    cfg: dict[str, Any],
+    cache: dict[str, dict[str, Any]] | None = None,
+) -> tuple[list[Item], dict[str, int]]:
+    items: list[Item] = []
     stats = {"feeds_total": 0, "feeds_ok": 0, "feeds_failed": 0}
     sources = cfg.get("sources", [])
     valid_sources = [s for s in sources if isinstance(s, dict) and s.get("type") == "rss"]
@@ -65,6 +206,7 @@ def fetch_category_items(
         _LOGGER.warning("No valid sources for category '%s', skipping.", category)
         return items, stats
 
+    feeds: list[tuple[str, str | None]] = []
     for source in valid_sources:
         stats["feeds_total"] += 1
         url = source.get("url")
@@ -73,15 +215,40 @@ def fetch_category_items(
             _LOGGER.warning("Invalid feed URL for category '%s'.", category)
             continue
         name = source.get("name") if isinstance(source.get("name"), str) else None
-        try:
-            parsed = feedparser.parse(url)
-        except Exception as exc:
-            stats["feeds_failed"] += 1
-            _LOGGER.warning("Failed to fetch feed '%s': %s", url, exc)
-            continue
-        stats["feeds_ok"] += 1
-        for entry in parsed.entries:
-            normalized = _normalize_entry(entry, name, category)
-            if normalized["title"] and normalized["link"]:
-                items.append(normalized)
+        feeds.append((url, name))
+    if not feeds:
+        return items, stats
+
+    with ThreadPoolExecutor(max_workers=min(_MAX_FEED_WORKERS, len(feeds))) as executor:
+        futures = [
+            executor.submit(_fetch_feed, url, cache.get(url) if cache is not None else None)
+            for url, _ in feeds
+        ]
+        for (url, name), future in zip(feeds, futures):
+            try:
+                parsed, etag, modified = future.result()
+            except Exception as exc:
+                stats["feeds_failed"] += 1
+                _LOGGER.warning("Failed to fetch feed '%s': %s", url, exc)
+                continue
+            cached = cache.get(url) if cache is not None else None
+            if parsed is None:
+                if cached is None:
+                    stats["feeds_failed"] += 1
+                    _LOGGER.warning("Feed '%s' not modified but no cached copy.", url)
+                    continue
+                stats["feeds_ok"] += 1
+                items.extend(_items_from_cache(cached, name, category))
+                continue
+            stats["feeds_ok"] += 1
+            if cache is None:
+                items.extend(_iter_items(parsed.entries, name, category))
+                continue
+            feed_items = list(_iter_items(parsed.entries, name, category))
+            items.extend(feed_items)
+            record = _cache_record(etag, modified, feed_items)
+            if record is not None:
+                cache[url] = record
+            else:
+                cache.pop(url, None)
     return items, stats
@@ -2,19 +2,28 @@
 
 from __future__ import annotations
 
-from typing import Any
+import re
+from functools import lru_cache
+from typing import Iterable, Iterator
+
+from .models import Item
+
+
+@lru_cache(maxsize=64)
+def _compile_keywords(keywords: tuple[str, ...]) -> re.Pattern[str]:
+    return re.compile("|".join(map(re.escape, dict.fromkeys(keywords))))
 
 
 def filter_by_keywords(
-    items: list[dict[str, Any]],
+    items: Iterable[Item],
     keywords: list[str],
-) -> list[dict[str, Any]]:
+) -> Iterator[Item]:
     if not keywords:
-        return items
-    lowered = [kw.lower() for kw in keywords]
-    filtered: list[dict[str, Any]] = []
-    for item in items:
-        haystack = f"{item.get('title', '')} {item.get('teaser', '')}".lower()
-        if any(kw in haystack for kw in lowered):
-            filtered.append(item)
-    return filtered
+        return iter(items)
+    pattern = _compile_keywords(tuple(kw.lower() for kw in keywords))
+
+    def matches(item: Item) -> bool:
+        haystack = f"{item.title} {item.teaser}".lower()
+        return pattern.search(haystack) is not None
+
+    return filter(matches, items)
@@ -3,47 +3,62 @@
 from __future__ import annotations
 
 import argparse
-import json
+import heapq
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable, Iterator
 
 from .config import load_config
 from .dedupe import dedupe_items
-from .feeds import fetch_category_items
+from .feeds import fetch_category_items, load_feed_cache, save_feed_cache
 from .keyword_filter import filter_by_keywords
+from .models import Item
 from .render_md import render_markdown
 from .send_telegram import send_daily_digest
-from .state import filter_items_against_history, load_history, update_state_file
+from .state import (
+    filter_items_against_hashes,
+    json_loads,
+    load_history,
+    recent_hashes,
+    update_state_file,
+)
 
 
 _DEFAULT_SOURCES = Path("sources.yaml")
 _DEFAULT_KEYWORDS = Path("keywords.local.yaml")
 _DEFAULT_STATE = Path("state.json")
 _DEFAULT_FIXTURES = Path("tests/fixtures/sample_items.json")
+_DEFAULT_FEED_CACHE = Path("feed_cache.json")
+_MAX_CATEGORY_WORKERS = 4
 
 _LOGGER = logging.getLogger(__name__)
 
 
 def _parse_fixture_datetime(value: str) -> datetime | None:
     try:
-        return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+        parsed = datetime.fromisoformat(value)
     except ValueError:
         return None
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed
 
 
-def _load_fixtures(path: Path) -> dict[str, list[dict[str, Any]]]:
-    data = json.loads(path.read_text(encoding="utf-8"))
+@lru_cache(maxsize=8)
+def _read_fixtures(path_str: str, mtime: float) -> dict[str, tuple[Item, ...]]:
+    data = json_loads(Path(path_str).read_bytes())
     categories = data.get("categories", {})
     if not isinstance(categories, dict):
         raise ValueError("Fixture file must contain a 'categories' mapping")
-    normalized: dict[str, list[dict[str, Any]]] = {}
+    normalized: dict[str, tuple[Item, ...]] = {}
     for key, items in categories.items():
         if not isinstance(items, list):
             continue
-        normalized[key] = []
+        parsed: list[Item] = []
         for item in items:
             if not isinstance(item, dict):
                 continue
@@ -51,27 +66,23 @@ def _load_fixtures(path: Path) -> dict[str, list[dict[str, Any]]]:
             published_dt = None
             if isinstance(published, str):
                 published_dt = _parse_fixture_datetime(published)
-            normalized[key].append(
-                {
-                    "title": item.get("title", ""),
-                    "teaser": item.get("teaser", ""),
-                    "link": item.get("link", ""),
-                    "published": published_dt,
-                    "source": item.get("source"),
-                    "category": key,
-                }
+            parsed.append(
+                Item(
+                    title=item.get("title", "").strip(),
+                    teaser=item.get("teaser", "").strip(),
+                    link=item.get("link", "").strip(),
+                    published=published_dt,
+                    source=item.get("source"),
+                    category=key,
+                )
             )
+        normalized[key] = tuple(parsed)
     return normalized
 
 
-def _sort_items(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
-    def sort_key(item: dict[str, Any]) -> tuple[int, float]:
-        published = item.get("published")
-        if isinstance(published, datetime):
-            return (1, published.timestamp())
-        return (0, 0.0)
-
-    return sorted(items, key=sort_key, reverse=True)
+def _load_fixtures(path: Path) -> dict[str, list[Item]]:
+    cached = _read_fixtures(str(path), path.stat().st_mtime)
+    return {key: list(items) for key, items in cached.items()}
 
 
 def _default_output_path(as_of: date) -> Path:
@@ -92,31 +103,28 @@ def _load_env_file(path: Path) -> None:
         os.environ.setdefault(key.strip(), value.strip())
 
 
-def _partition_fresh(
-    items: list[dict[str, Any]], cutoff: datetime
-) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
-    fresh: list[dict[str, Any]] = []
-    stale: list[dict[str, Any]] = []
-    for item in items:
-        published = item.get("published")
-        if isinstance(published, datetime) and published >= cutoff:
-            fresh.append(item)
-        else:
-            stale.append(item)
-    return fresh, stale
-
-
-def _apply_source_cap(
-    items: list[dict[str, Any]],
+def _select_with_source_cap(
+    items: list[Item],
+    cutoff: datetime,
     max_per_source: int,
-    counts: dict[str, int],
     limit: int,
-) -> list[dict[str, Any]]:
-    selected: list[dict[str, Any]] = []
-    for item in items:
-        if len(selected) >= limit:
-            break
-        source = item.get("source")
+) -> list[Item]:
+    cutoff_ts = cutoff.timestamp()
+    heap = [
+        (
+            not (item.has_date and item.sort_ts >= cutoff_ts),
+            not item.has_date,
+            -item.sort_ts,
+            index,
+        )
+        for index, item in enumerate(items)
+    ]
+    heapq.heapify(heap)
+    counts: dict[str, int] = {}
+    selected: list[Item] = []
+    while heap and len(selected) < limit:
+        item = items[heapq.heappop(heap)[-1]]
+        source = item.source
         source_key = source if isinstance(source, str) and source else "unknown"
         if counts.get(source_key, 0) >= max_per_source:
             continue
@@ -125,12 +133,18 @@ def _apply_source_cap(
     return selected
 
 
+def _counted(items: Iterable[Item], stats: dict[str, int], key: str) -> Iterator[Item]:
+    for item in items:
+        stats[key] += 1
+        yield item
+
+
 def _select_items_for_category(
-    items: list[dict[str, Any]],
+    items: list[Item],
     cfg: dict[str, Any],
-    history: list[dict[str, str]],
+    seen: set[str],
     now: datetime,
-) -> tuple[list[dict[str, Any]], dict[str, int]]:
+) -> tuple[list[Item], dict[str, int]]:
     stats = {
         "fetched": len(items),
         "after_keyword": 0,
@@ -144,23 +158,17 @@ def _select_items_for_category(
     if require_keywords and not keywords:
         return [], stats
 
+    kept: Iterable[Item] = items
     if keywords:
-        items = filter_by_keywords(items, keywords)
-    stats["after_keyword"] = len(items)
+        kept = _counted(filter_by_keywords(items, keywords), stats, "after_keyword")
+    else:
+        stats["after_keyword"] = len(items)
 
-    items = dedupe_items(items)
+    items = dedupe_items(kept)
     stats["after_dedupe"] = len(items)
 
-    items = _sort_items(items)
-
-    fresh_hours = cfg.get("fresh_hours", 36)
-    cutoff = now - timedelta(hours=fresh_hours)
-    fresh_items, stale_items = _partition_fresh(items, cutoff)
-
-    history_date = now.date()
-    fresh_items = filter_items_against_history(fresh_items, history, history_date)
-    stale_items = filter_items_against_history(stale_items, history, history_date)
-    stats["after_anti_repeat"] = len(fresh_items) + len(stale_items)
+    items = filter_items_against_hashes(items, seen)
+    stats["after_anti_repeat"] = len(items)
 
     limit = cfg.get("limit", 0)
     if not isinstance(limit, int) or limit <= 0:
@@ -170,33 +178,54 @@ def _select_items_for_category(
     if not isinstance(max_per_source, int) or max_per_source <= 0:
         max_per_source = limit
 
-    counts: dict[str, int] = {}
-    selected = _apply_source_cap(fresh_items, max_per_source, counts, limit)
-    if len(selected) < limit:
-        remaining = limit - len(selected)
-        backfill = _apply_source_cap(stale_items, max_per_source, counts, remaining)
-        selected.extend(backfill)
+    fresh_hours = cfg.get("fresh_hours", 36)
+    cutoff = now - timedelta(hours=fresh_hours)
+    selected = _select_with_source_cap(items, cutoff, max_per_source, limit)
 
     stats["final"] = len(selected)
     return selected, stats
 
 
+def _run_category(
+    category: str,
+    cfg: dict[str, Any],
+    seen: set[str],
+    now: datetime,
+    feed_cache: dict[str, dict[str, Any]] | None,
+) -> tuple[list[Item], dict[str, int], dict[str, int]]:
+    items, feed_stats = fetch_category_items(category, cfg, feed_cache)
+    selected, cat_stats = _select_items_for_category(items, cfg, seen, now)
+    return selected, feed_stats, cat_stats
+
+
 def build_items_by_category(
     config: dict[str, Any],
     history: list[dict[str, str]],
-) -> tuple[dict[str, list[dict[str, Any]]], dict[str, dict[str, int]], dict[str, int]]:
+    feed_cache: dict[str, dict[str, Any]] | None = None,
+) -> tuple[dict[str, list[Item]], dict[str, dict[str, int]], dict[str, int]]:
     now = datetime.now(timezone.utc)
-    result: dict[str, list[dict[str, Any]]] = {}
+    seen = recent_hashes(history, now.date())
+    result: dict[str, list[Item]] = {}
     per_category_stats: dict[str, dict[str, int]] = {}
     feed_stats = {"feeds_total": 0, "feeds_ok": 0, "feeds_failed": 0}
 
-    for category, cfg in config["categories"].items():
-        items, stats = fetch_category_items(category, cfg)
-        for key in feed_stats:
-            feed_stats[key] += stats.get(key, 0)
-        selected, cat_stats = _select_items_for_category(items, cfg, history, now)
-        result[category] = selected
-        per_category_stats[category] = cat_stats
+    categories = config["categories"]
+    if not categories:
+        return result, per_category_stats, feed_stats
+
+    with ThreadPoolExecutor(max_workers=min(_MAX_CATEGORY_WORKERS, len(categories))) as executor:
+        futures = {
+            category: executor.submit(
+                _run_category, category, cfg, seen, now, feed_cache
+            )
+            for category, cfg in categories.items()
+        }
+        for category, future in futures.items():
+            selected, stats, cat_stats = future.result()
+            for key in feed_stats:
+                feed_stats[key] += stats.get(key, 0)
+            result[category] = selected
+            per_category_stats[category] = cat_stats
 
     return result, per_category_stats, feed_stats
 
@@ -205,20 +234,21 @@ def build_items_from_fixtures(
     fixtures_path: Path,
     config: dict[str, Any],
     history: list[dict[str, str]],
-) -> tuple[dict[str, list[dict[str, Any]]], dict[str, dict[str, int]]]:
+) -> tuple[dict[str, list[Item]], dict[str, dict[str, int]]]:
     data = _load_fixtures(fixtures_path)
     now = datetime.now(timezone.utc)
-    result: dict[str, list[dict[str, Any]]] = {}
+    seen = recent_hashes(history, now.date())
+    result: dict[str, list[Item]] = {}
     per_category_stats: dict[str, dict[str, int]] = {}
     for category, cfg in config["categories"].items():
         items = data.get(category, [])
-        selected, cat_stats = _select_items_for_category(items, cfg, history, now)
+        selected, cat_stats = _select_items_for_category(items, cfg, seen, now)
         result[category] = selected
         per_category_stats[category] = cat_stats
     return result, per_category_stats
 
 
-def _write_markdown(items_by_category: dict[str, list[dict[str, Any]]], as_of: date, output: str) -> bool:
+def _write_markdown(items_by_category: dict[str, list[Item]], as_of: date, output: str) -> bool:
     try:
         output_path = Path(output) if output else _default_output_path(as_of)
         markdown = render_markdown(items_by_category, as_of)
@@ -249,6 +279,7 @@ def main() -> int:
     parser.add_argument("--state", default=str(_DEFAULT_STATE))
     parser.add_argument("--dry-run", action="store_true")
     parser.add_argument("--fixtures", default=str(_DEFAULT_FIXTURES))
+    parser.add_argument("--feed-cache", default=str(_DEFAULT_FEED_CACHE))
     parser.add_argument("--env-file", default="")
     parser.add_argument("--markdown", action="store_true")
     parser.add_argument("--markdown-only", action="store_true")
@@ -261,6 +292,7 @@ def main() -> int:
     keywords_path = Path(args.keywords)
     state_path = Path(args.state)
     fixtures_path = Path(args.fixtures)
+    feed_cache_path = Path(args.feed_cache)
 
     try:
         config = load_config(sources_path, keywords_path)
@@ -276,9 +308,21 @@ def main() -> int:
             fixtures_path, config, history
         )
     else:
+        feed_cache = load_feed_cache(feed_cache_path)
         items_by_category, per_category_stats, feed_stats = build_items_by_category(
-            config, history
+            config, history, feed_cache
         )
+        configured_urls = {
+            source.get("url")
+            for cfg in config["categories"].values()
+            for source in cfg.get("sources", [])
+            if isinstance(source, dict)
+        }
+        feed_cache = {url: record for url, record in feed_cache.items() if url in configured_urls}
+        try:
+            save_feed_cache(feed_cache_path, feed_cache)
+        except OSError as exc:
+            _LOGGER.warning("Failed to write feed cache: %s", exc)
 
     today = datetime.now(timezone.utc).date()
 
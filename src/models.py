@@ -0,0 +1,26 @@
+"""Shared item record used across the pipeline."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+
+
+@dataclass(frozen=True, slots=True)
+class Item:
+    title: str
+    teaser: str
+    link: str
+    published: datetime | None = None
+    source: str | None = None
+    category: str = ""
+    has_date: bool = field(init=False, repr=False, compare=False)
+    sort_ts: float = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "has_date", self.published is not None)
+        object.__setattr__(
+            self,
+            "sort_ts",
+            self.published.timestamp() if self.published is not None else 0.0,
+        )
@@ -5,35 +5,53 @@ from __future__ import annotations
 import json
 import logging
 import os
-import urllib.error
-import urllib.parse
-import urllib.request
+import re
 from datetime import date
-from typing import Any
+from functools import lru_cache
+from html import unescape
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .models import Item
+from .render_md import display_name
 
 _MAX_MESSAGE_LEN = 3800
+_HTML_ESCAPE_TABLE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+_ANCHOR_RE = re.compile(r'<a href="([^"]*)">(.*?)</a>')
+_TAG_RE = re.compile(r"<[^>]+>")
 
 _LOGGER = logging.getLogger(__name__)
 
-
-def _display_name(key: str) -> str:
-    return key.replace("_", " ").title()
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
 
 
+@lru_cache(maxsize=1024)
 def _escape_html(value: str) -> str:
-    return (
-        value.replace("&", "&amp;")
-        .replace("<", "&lt;")
-        .replace(">", "&gt;")
-    )
+    return value.translate(_HTML_ESCAPE_TABLE)
 
 
+@lru_cache(maxsize=256)
 def _main_domain(url: str) -> str:
-    try:
-        parsed = urllib.parse.urlparse(url)
-    except ValueError:
-        return ""
-    host = parsed.netloc.lower()
+    if url.startswith("//"):
+        start = 2
+    else:
+        scheme_end = url.find("://")
+        scheme = url[:scheme_end]
+        if scheme_end <= 0 or not (
+            scheme.isascii()
+            and scheme[0].isalpha()
+            and all(ch.isalnum() or ch in "+-." for ch in scheme)
+        ):
+            return ""
+        start = scheme_end + 3
+    end = len(url)
+    for separator in "/?#":
+        index = url.find(separator, start, end)
+        if index >= 0:
+            end = index
+    host = url[start:end].lower()
     if host.startswith("www."):
         host = host[4:]
     return host
@@ -47,10 +65,21 @@ def _truncate(text: str, max_len: int) -> str:
     return text[: max_len - 1] + "…"
 
 
-def _build_item_block(item: dict[str, Any], html: bool, max_len: int) -> str:
-    title = item.get("title", "").strip()
-    teaser = item.get("teaser", "").strip()
-    link = item.get("link", "").strip()
+def _truncate_html(text: str, max_len: int) -> str:
+    truncated = _truncate(text, max_len)
+    if len(truncated) == len(text):
+        return truncated
+    head = truncated[:-1]
+    amp = head.rfind("&")
+    if amp >= 0 and ";" not in head[amp:]:
+        return head[:amp] + "…"
+    return truncated
+
+
+def _build_item_block(item: Item, html: bool, max_len: int) -> str:
+    title = item.title
+    teaser = item.teaser
+    link = item.link
 
     domain = _main_domain(link) if link else ""
     label = "Full Article"
@@ -60,7 +89,7 @@ def _build_item_block(item: dict[str, Any], html: bool, max_len: int) -> str:
     if html:
         title = _escape_html(title)
         teaser = _escape_html(teaser)
-        link = _escape_html(link)
+        link = _escape_html(link).replace('"', "&quot;")
         label = _escape_html(label)
 
     title_line = f"<b>{title}</b>" if html else title
@@ -70,26 +99,28 @@ def _build_item_block(item: dict[str, Any], html: bool, max_len: int) -> str:
     if not html and link:
         link_line = f"{label}: {link}"
 
-    lines = [title_line]
+    block_len = len(title_line)
     if teaser:
-        lines.append(teaser)
+        block_len += 1 + len(teaser)
     if link_line:
-        lines.append(link_line)
-
-    block = "\n".join(lines)
-    if len(block) <= max_len:
-        return block
+        block_len += 1 + len(link_line)
+    if block_len <= max_len:
+        if teaser and link_line:
+            return f"{title_line}\n{teaser}\n{link_line}"
+        if teaser or link_line:
+            return f"{title_line}\n{teaser or link_line}"
+        return title_line
 
     if teaser:
-        teaser = _truncate(teaser, max_len)
+        teaser = (_truncate_html if html else _truncate)(teaser, max_len)
         lines = [title_line, teaser]
         if link_line:
             lines.append(link_line)
         block = "\n".join(lines)
-    if len(block) <= max_len:
-        return block
+        if len(block) <= max_len:
+            return block
 
-    title_line = _truncate(title_line, max_len)
+    title_line = (_truncate_html if html else _truncate)(title_line, max_len)
     lines = [title_line]
     if link_line:
         lines.append(link_line)
@@ -97,7 +128,7 @@ def _build_item_block(item: dict[str, Any], html: bool, max_len: int) -> str:
 
 
 def build_message_chunks(
-    items_by_category: dict[str, list[dict[str, Any]]],
+    items_by_category: dict[str, list[Item]],
     as_of: date,
     html: bool = True,
 ) -> list[str]:
@@ -106,14 +137,17 @@ def build_message_chunks(
         header = _escape_html(header)
 
     chunks: list[str] = []
-    current = header
+    header_len = len(header)
+    parts = [header]
+    current_len = header_len
 
     for category, items in items_by_category.items():
-        heading = _display_name(category)
+        heading = display_name(category)
         if html:
             heading = f"<u><b>{_escape_html(heading)}</b></u>"
+        heading_len = len(heading)
 
-        category_items: list[dict[str, Any] | None] = []
+        category_items: list[Item | None] = []
         if not items:
             category_items.append(None)
         else:
@@ -125,56 +159,64 @@ def build_message_chunks(
                 item_block = "- No items"
             else:
                 item_block = _build_item_block(item, html, _MAX_MESSAGE_LEN)
-            block_lines = [heading, item_block] if not started_category else [item_block]
-            block = "\n".join(block_lines)
-            candidate = f"{current}\n\n{block}" if current else block
-            if len(candidate) <= _MAX_MESSAGE_LEN:
-                current = candidate
+            block_len = len(item_block) if started_category else heading_len + 1 + len(item_block)
+            if current_len + 2 + block_len <= _MAX_MESSAGE_LEN:
+                parts.append(item_block if started_category else f"{heading}\n{item_block}")
+                current_len += 2 + block_len
                 started_category = True
                 continue
 
-            if current:
-                chunks.append(current.strip())
-                started_category = False
+            chunks.append("\n\n".join(parts).strip())
+            started_category = False
 
-            available = _MAX_MESSAGE_LEN - len(f"{header}\n\n{heading}\n")
+            available = _MAX_MESSAGE_LEN - header_len - heading_len - 3
             if item is None:
                 adjusted_item = "- No items"
             else:
                 adjusted_item = _build_item_block(item, html, max(available, 1))
-            block = "\n".join([heading, adjusted_item])
-            current = f"{header}\n\n{block}"
-            if len(current) > _MAX_MESSAGE_LEN:
+            block = f"{heading}\n{adjusted_item}"
+            if header_len + 2 + len(block) > _MAX_MESSAGE_LEN:
                 chunks.append(block.strip())
-                current = header
+                parts = [header]
+                current_len = header_len
                 started_category = False
             else:
+                parts = [header, block]
+                current_len = header_len + 2 + len(block)
                 started_category = True
 
-    if current:
-        chunks.append(current.strip())
+    chunks.append("\n\n".join(parts).strip())
 
     return chunks
 
 
+def _html_to_plain(chunk: str) -> str:
+    text = _ANCHOR_RE.sub(r"\2: \1", chunk)
+    return unescape(_TAG_RE.sub("", text))
+
+
+@lru_cache(maxsize=4)
+def _send_url(token: str) -> str:
+    return f"https://api.telegram.org/bot{token}/sendMessage"
+
+
 def _send_text(token: str, chat_id: str, text: str, parse_mode: str | None) -> bool:
     payload_dict = {"chat_id": chat_id, "text": text}
     if parse_mode:
         payload_dict["parse_mode"] = parse_mode
-    payload = urllib.parse.urlencode(payload_dict).encode("utf-8")
-    url = f"https://api.telegram.org/bot{token}/sendMessage"
-    request = urllib.request.Request(url, data=payload, method="POST")
-
     try:
-        with urllib.request.urlopen(request, timeout=10) as response:
-            raw = response.read().decode("utf-8")
-    except urllib.error.HTTPError as exc:
-        body = exc.read().decode("utf-8", errors="replace")
-        _LOGGER.warning("Telegram send failed: HTTP %s %s", exc.code, exc.reason)
-        _LOGGER.debug("Telegram response body: %s", body)
+        response = _SESSION.post(_send_url(token), json=payload_dict, timeout=10)
+    except requests.RequestException as exc:
+        # requests includes the request URL in its errors; keep the token out of logs.
+        _LOGGER.warning("Telegram send failed: %s", str(exc).replace(token, "***"))
         return False
-    except urllib.error.URLError as exc:
-        _LOGGER.warning("Telegram send failed: %s", exc)
+
+    raw = response.text
+    if not response.ok:
+        _LOGGER.warning(
+            "Telegram send failed: HTTP %s %s", response.status_code, response.reason
+        )
+        _LOGGER.debug("Telegram response body: %s", raw)
         return False
 
     try:
@@ -193,7 +235,7 @@ def _send_text(token: str, chat_id: str, text: str, parse_mode: str | None) -> b
 
 
 def send_daily_digest(
-    items_by_category: dict[str, list[dict[str, Any]]],
+    items_by_category: dict[str, list[Item]],
     as_of: date,
 ) -> bool:
     token = os.getenv("TELEGRAM_BOT_TOKEN")
@@ -203,13 +245,12 @@ def send_daily_digest(
         return False
 
     chunks = build_message_chunks(items_by_category, as_of, html=True)
-    for chunk in chunks:
+    for index, chunk in enumerate(chunks):
         if _send_text(token, chat_id, chunk, "HTML"):
             continue
         _LOGGER.warning("Telegram HTML send failed; retrying with plain text.")
-        text_chunks = build_message_chunks(items_by_category, as_of, html=False)
-        for text_chunk in text_chunks:
-            if not _send_text(token, chat_id, text_chunk, None):
+        for html_chunk in chunks[index:]:
+            if not _send_text(token, chat_id, _html_to_plain(html_chunk), None):
                 return False
         return True
 
@@ -4,15 +4,36 @@ from __future__ import annotations
 
 import hashlib
 import json
+import os
 from datetime import date, datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Iterable
 
 from .dedupe import normalize_title
+from .models import Item
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 _STATE_DAYS = 5
 
 
+def json_loads(raw: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw.decode("utf-8"))
+
+
+def json_dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+@lru_cache(maxsize=64)
 def _parse_date(value: str) -> date | None:
     try:
         return datetime.strptime(value, "%Y-%m-%d").date()
@@ -20,73 +41,84 @@ def _parse_date(value: str) -> date | None:
         return None
 
 
+@lru_cache(maxsize=4096)
 def title_hash(title: str) -> str:
     normalized = normalize_title(title)
-    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
 
 
-def load_history(path: Path) -> list[dict[str, str]]:
-    if not path.exists():
-        return []
+def _loads_or_none(raw: bytes) -> Any:
     try:
-        data = json.loads(path.read_text(encoding="utf-8"))
-    except json.JSONDecodeError:
-        return []
-    if not isinstance(data, dict):
+        return json_loads(raw)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+
+
+def _read_records(raw: bytes) -> list[Any]:
+    # The state file holds one {"hash", "date"} object per line. Files written
+    # before that hold a single {"history": [...]} document instead.
+    lines = [line for line in raw.splitlines() if line.strip()]
+    if not lines:
         return []
-    history = data.get("history", [])
-    if not isinstance(history, list):
+    first = _loads_or_none(lines[0])
+    if not (isinstance(first, dict) and "hash" in first):
+        document = _loads_or_none(raw)
+        if isinstance(document, dict) and "history" in document:
+            history = document["history"]
+            return history if isinstance(history, list) else []
+    return [record for record in map(_loads_or_none, lines) if record is not None]
+
+
+def load_history(path: Path) -> list[dict[str, str]]:
+    if not path.exists():
         return []
+    history = _read_records(path.read_bytes())
     cleaned: list[dict[str, str]] = []
     for item in history:
         if not isinstance(item, dict):
             continue
         h = item.get("hash")
         d = item.get("date")
-        if isinstance(h, str) and isinstance(d, str) and _parse_date(d):
-            cleaned.append({"hash": h, "date": d})
+        parsed = _parse_date(d) if isinstance(d, str) else None
+        if isinstance(h, str) and parsed is not None:
+            # Canonical ISO dates keep string comparisons in _prune_history valid.
+            cleaned.append({"hash": h, "date": parsed.isoformat()})
     return cleaned
 
 
 def _prune_history(history: Iterable[dict[str, str]], as_of: date) -> list[dict[str, str]]:
-    cutoff = as_of - timedelta(days=_STATE_DAYS - 1)
-    pruned: list[dict[str, str]] = []
-    for item in history:
-        d = _parse_date(item["date"])
-        if d is None:
-            continue
-        if d >= cutoff:
-            pruned.append(item)
-    return pruned
+    cutoff = (as_of - timedelta(days=_STATE_DAYS - 1)).isoformat()
+    return [item for item in history if item["date"] >= cutoff]
+
+
+def recent_hashes(history: Iterable[dict[str, str]], as_of: date) -> set[str]:
+    return {item["hash"] for item in _prune_history(history, as_of)}
+
+
+def filter_items_against_hashes(items: list[Item], hashes: set[str]) -> list[Item]:
+    return [item for item in items if title_hash(item.title) not in hashes]
 
 
 def filter_items_against_history(
-    items: list[dict[str, Any]],
+    items: list[Item],
     history: list[dict[str, str]],
     as_of: date,
-) -> list[dict[str, Any]]:
-    recent = _prune_history(history, as_of)
-    recent_hashes = {item["hash"] for item in recent}
-    filtered: list[dict[str, Any]] = []
-    for item in items:
-        h = title_hash(item["title"])
-        if h in recent_hashes:
-            continue
-        filtered.append(item)
-    return filtered
+) -> list[Item]:
+    return filter_items_against_hashes(items, recent_hashes(history, as_of))
 
 
 def update_state_file(
     path: Path,
-    items: list[dict[str, Any]],
+    items: list[Item],
     as_of: date,
 ) -> None:
-    history = load_history(path)
+    history = _prune_history(load_history(path), as_of)
     combined: dict[str, str] = {item["hash"]: item["date"] for item in history}
-    today = as_of.strftime("%Y-%m-%d")
+    today = as_of.isoformat()
     for item in items:
-        combined[title_hash(item["title"])] = today
+        combined[title_hash(item.title)] = today
     merged = [{"hash": h, "date": d} for h, d in combined.items()]
-    pruned = _prune_history(merged, as_of)
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps({"history": pruned}, indent=2), encoding="utf-8")
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    tmp_path.write_bytes(b"".join(json_dumps(entry) + b"\n" for entry in merged))
+    os.replace(tmp_path, path)
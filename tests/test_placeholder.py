@@ -1,15 +1,33 @@
 from datetime import date, datetime, timedelta, timezone
+from html import escape
+from urllib.parse import urlparse
 from pathlib import Path
 
 import pytest
+import requests
 
+from src import feeds
 from src.config import load_config
 from src.dedupe import dedupe_items, normalize_title
-from src.feeds import _strip_html
+from src.feeds import _items_from_cache, _strip_html, load_feed_cache, save_feed_cache
 from src.keyword_filter import filter_by_keywords
 from src.main import _select_items_for_category
-from src.send_telegram import _MAX_MESSAGE_LEN, _escape_html, build_message_chunks
-from src.state import filter_items_against_history, title_hash, update_state_file
+from src.models import Item
+from src.send_telegram import (
+    _MAX_MESSAGE_LEN,
+    _build_item_block,
+    _escape_html,
+    _html_to_plain,
+    _main_domain,
+    build_message_chunks,
+)
+from src.state import (
+    filter_items_against_history,
+    load_history,
+    recent_hashes,
+    title_hash,
+    update_state_file,
+)
 
 
 def test_normalize_title_and_dedupe_keeps_newest() -> None:
@@ -18,45 +36,55 @@ def test_normalize_title_and_dedupe_keeps_newest() -> None:
     assert normalize_title(title_a) == "hello world"
 
     items = [
-        {
-            "title": title_a,
-            "teaser": "",
-            "link": "https://example.com/a",
-            "published": datetime(2025, 1, 1, tzinfo=timezone.utc),
-        },
-        {
-            "title": title_b,
-            "teaser": "",
-            "link": "https://example.com/b",
-            "published": datetime(2025, 1, 2, tzinfo=timezone.utc),
-        },
+        Item(
+            title=title_a,
+            teaser="",
+            link="https://example.com/a",
+            published=datetime(2025, 1, 1, tzinfo=timezone.utc),
+        ),
+        Item(
+            title=title_b,
+            teaser="",
+            link="https://example.com/b",
+            published=datetime(2025, 1, 2, tzinfo=timezone.utc),
+        ),
     ]
     deduped = dedupe_items(items)
     assert len(deduped) == 1
-    assert deduped[0]["link"] == "https://example.com/b"
+    assert deduped[0].link == "https://example.com/b"
 
 
 def test_keyword_filtering_case_insensitive() -> None:
     items = [
-        {"title": "Peregrina opens center", "teaser": "", "link": "x"},
-        {"title": "Other news", "teaser": "Asyl topic", "link": "y"},
-        {"title": "Unrelated", "teaser": "", "link": "z"},
+        Item(title="Peregrina opens center", teaser="", link="x"),
+        Item(title="Other news", teaser="Asyl topic", link="y"),
+        Item(title="Unrelated", teaser="", link="z"),
     ]
     keywords = ["peregrina", "asyl"]
     filtered = filter_by_keywords(items, keywords)
-    assert [item["link"] for item in filtered] == ["x", "y"]
+    assert [item.link for item in filtered] == ["x", "y"]
+
+
+def test_keyword_filtering_matches_phrases_and_word_parts() -> None:
+    items = [
+        Item(title="FC St. Gallen gewinnt", teaser="", link="x"),
+        Item(title="Neues Asylheim", teaser="", link="y"),
+        Item(title="Gallen", teaser="", link="z"),
+    ]
+    filtered = filter_by_keywords(items, ["FC St. Gallen", "asyl"])
+    assert [item.link for item in filtered] == ["x", "y"]
 
 
 def test_cross_day_anti_repeat(tmp_path: Path) -> None:
     state_path = tmp_path / "state.json"
     as_of = date(2025, 1, 10)
     items = [
-        {
-            "title": "Repeated headline",
-            "teaser": "",
-            "link": "https://example.com/1",
-            "published": datetime(2025, 1, 10, tzinfo=timezone.utc),
-        }
+        Item(
+            title="Repeated headline",
+            teaser="",
+            link="https://example.com/1",
+            published=datetime(2025, 1, 10, tzinfo=timezone.utc),
+        )
     ]
     update_state_file(state_path, items, as_of)
 
@@ -70,34 +98,54 @@ def test_cross_day_anti_repeat(tmp_path: Path) -> None:
     assert filtered == []
 
 
+def test_state_file_is_line_delimited_and_reads_legacy(tmp_path: Path) -> None:
+    state_path = tmp_path / "state.json"
+    state_path.write_text(
+        '{\n  "history": [\n    {"hash": "old", "date": "2025-01-09"}\n  ]\n}',
+        encoding="utf-8",
+    )
+    assert load_history(state_path) == [{"hash": "old", "date": "2025-01-09"}]
+
+    update_state_file(state_path, [Item(title="New", teaser="", link="x")], date(2025, 1, 10))
+    lines = state_path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 2
+    assert load_history(state_path) == [
+        {"hash": "old", "date": "2025-01-09"},
+        {"hash": title_hash("New"), "date": "2025-01-10"},
+    ]
+
+    state_path.write_bytes(b'{"hash":"a","date":"2025-01-01"}\n{"hash":"b","da')
+    assert load_history(state_path) == [{"hash": "a", "date": "2025-01-01"}]
+
+
 def test_fresh_window_with_backfill() -> None:
     now = datetime(2025, 1, 10, 12, 0, tzinfo=timezone.utc)
     items = [
-        {
-            "title": "Fresh item",
-            "teaser": "",
-            "link": "https://example.com/fresh",
-            "published": now - timedelta(hours=2),
-            "source": "a",
-        },
-        {
-            "title": "Old item",
-            "teaser": "",
-            "link": "https://example.com/old",
-            "published": now - timedelta(hours=50),
-            "source": "b",
-        },
-        {
-            "title": "No date item",
-            "teaser": "",
-            "link": "https://example.com/nodate",
-            "published": None,
-            "source": "c",
-        },
+        Item(
+            title="Fresh item",
+            teaser="",
+            link="https://example.com/fresh",
+            published=now - timedelta(hours=2),
+            source="a",
+        ),
+        Item(
+            title="Old item",
+            teaser="",
+            link="https://example.com/old",
+            published=now - timedelta(hours=50),
+            source="b",
+        ),
+        Item(
+            title="No date item",
+            teaser="",
+            link="https://example.com/nodate",
+            published=None,
+            source="c",
+        ),
     ]
     cfg = {"limit": 2, "fresh_hours": 24, "max_per_source": 2, "keywords": []}
-    selected, _ = _select_items_for_category(items, cfg, [], now)
-    assert [item["link"] for item in selected] == [
+    selected, _ = _select_items_for_category(items, cfg, set(), now)
+    assert [item.link for item in selected] == [
         "https://example.com/fresh",
         "https://example.com/old",
     ]
@@ -106,58 +154,58 @@ def test_fresh_window_with_backfill() -> None:
 def test_per_source_cap_fills_from_others() -> None:
     now = datetime(2025, 1, 10, 12, 0, tzinfo=timezone.utc)
     items = [
-        {
-            "title": "A1",
-            "teaser": "",
-            "link": "https://example.com/a1",
-            "published": now - timedelta(hours=1),
-            "source": "a",
-        },
-        {
-            "title": "A2",
-            "teaser": "",
-            "link": "https://example.com/a2",
-            "published": now - timedelta(hours=2),
-            "source": "a",
-        },
-        {
-            "title": "B1",
-            "teaser": "",
-            "link": "https://example.com/b1",
-            "published": now - timedelta(hours=3),
-            "source": "b",
-        },
-        {
-            "title": "C1",
-            "teaser": "",
-            "link": "https://example.com/c1",
-            "published": now - timedelta(hours=4),
-            "source": "c",
-        },
+        Item(
+            title="A1",
+            teaser="",
+            link="https://example.com/a1",
+            published=now - timedelta(hours=1),
+            source="a",
+        ),
+        Item(
+            title="A2",
+            teaser="",
+            link="https://example.com/a2",
+            published=now - timedelta(hours=2),
+            source="a",
+        ),
+        Item(
+            title="B1",
+            teaser="",
+            link="https://example.com/b1",
+            published=now - timedelta(hours=3),
+            source="b",
+        ),
+        Item(
+            title="C1",
+            teaser="",
+            link="https://example.com/c1",
+            published=now - timedelta(hours=4),
+            source="c",
+        ),
     ]
     cfg = {"limit": 3, "fresh_hours": 36, "max_per_source": 1, "keywords": []}
-    selected, _ = _select_items_for_category(items, cfg, [], now)
-    sources = [item["source"] for item in selected]
+    selected, _ = _select_items_for_category(items, cfg, set(), now)
+    sources = [item.source for item in selected]
     assert sources.count("a") == 1
     assert len(selected) == 3
 
 
 def test_anti_repeat_with_backfill() -> None:
     now = datetime(2025, 1, 10, 12, 0, tzinfo=timezone.utc)
-    fresh_item = {
-        "title": "Fresh headline",
-        "teaser": "",
-        "link": "https://example.com/fresh",
-        "published": now - timedelta(hours=1),
-        "source": "a",
-    }
-    stale_item = {
-        "title": "Stale headline",
-        "teaser": "",
-        "link": "https://example.com/stale",
-        "published": now - timedelta(hours=60),
-        "source": "b",
-    }
+    fresh_item = Item(
+        title="Fresh headline",
+        teaser="",
+        link="https://example.com/fresh",
+        published=now - timedelta(hours=1),
+        source="a",
+    )
+    stale_item = Item(
+        title="Stale headline",
+        teaser="",
+        link="https://example.com/stale",
+        published=now - timedelta(hours=60),
+        source="b",
+    )
     history = [
         {
             "hash": title_hash("Fresh headline"),
@@ -165,20 +213,22 @@ def test_anti_repeat_with_backfill() -> None:
         }
     ]
     cfg = {"limit": 1, "fresh_hours": 36, "max_per_source": 2, "keywords": []}
-    selected, _ = _select_items_for_category([fresh_item, stale_item], cfg, history, now)
-    assert [item["link"] for item in selected] == ["https://example.com/stale"]
+    selected, _ = _select_items_for_category(
+        [fresh_item, stale_item], cfg, recent_hashes(history, now.date()), now
+    )
+    assert [item.link for item in selected] == ["https://example.com/stale"]
 
 
 def test_require_keywords_blocks_when_missing() -> None:
     now = datetime(2025, 1, 10, 12, 0, tzinfo=timezone.utc)
     items = [
-        {
-            "title": "Keyword headline",
-            "teaser": "mentions peregrina",
-            "link": "https://example.com/kw",
-            "published": now - timedelta(hours=1),
-            "source": "a",
-        }
+        Item(
+            title="Keyword headline",
+            teaser="mentions peregrina",
+            link="https://example.com/kw",
+            published=now - timedelta(hours=1),
+            source="a",
+        )
     ]
     cfg = {
         "limit": 1,
@@ -187,7 +237,7 @@ def test_require_keywords_blocks_when_missing() -> None:
         "keywords": [],
         "require_keywords": True,
     }
-    selected, _ = _select_items_for_category(items, cfg, [], now)
+    selected, _ = _select_items_for_category(items, cfg, set(), now)
     assert selected == []
 
 
@@ -196,11 +246,11 @@ def test_telegram_splitting_length() -> None:
     items = []
     for idx in range(80):
         items.append(
-            {
-                "title": f"Item {idx}",
-                "teaser": long_teaser,
-                "link": f"https://example.com/{idx}",
-            }
+            Item(
+                title=f"Item {idx}",
+                teaser=long_teaser,
+                link=f"https://example.com/{idx}",
+            )
         )
     items_by_category = {
         "world": items
@@ -210,6 +260,28 @@ def test_telegram_splitting_length() -> None:
     assert all(len(chunk) <= _MAX_MESSAGE_LEN for chunk in chunks)
 
 
+def test_plain_text_fallback_matches_plain_rendering() -> None:
+    items_by_category = {
+        "world": [
+            Item(
+                title="Fish & <Chips>",
+                teaser="Prices < 5",
+                link="https://www.example.com/a?x=1&y=2",
+            ),
+            Item(title="Quoted", teaser="", link='https://example.com/a"b'),
+        ],
+        "empty_category": [],
+    }
+    as_of = date(2025, 1, 10)
+    html_chunks = build_message_chunks(items_by_category, as_of, html=True)
+    plain_chunks = build_message_chunks(items_by_category, as_of, html=False)
+    assert [_html_to_plain(chunk) for chunk in html_chunks] == plain_chunks
+
+    truncated = _build_item_block(Item(title="Fish & Chips", teaser="", link=""), True, 12)
+    assert truncated == "<b>Fish …"
+    assert _html_to_plain(truncated) == "Fish …"
+
+
 def test_html_strip_and_escape() -> None:
     raw = "<p>Hello &amp; <img src='x'>World</p>"
     stripped = _strip_html(raw)
@@ -219,6 +291,22 @@ def test_html_strip_and_escape() -> None:
     assert escaped == "Hello &amp; World"
 
 
+def test_main_domain_matches_urlparse() -> None:
+    urls = [
+        "https://www.Example.com/a?b=1#c",
+        "http://example.com",
+        "https://example.com:8443/path",
+        "example.com/a?u=http://b.com",
+        "//ex.com/a",
+        "/news/1",
+        "mailto:someone@example.com",
+        "",
+    ]
+    for url in urls:
+        expected = urlparse(url).netloc.lower().removeprefix("www.")
+        assert _main_domain(url) == expected, url
+
+
 def test_config_validation_messages(tmp_path: Path) -> None:
     bad_path = tmp_path / "sources.yaml"
     bad_path.write_text("not_categories: 1", encoding="utf-8")
@@ -233,3 +321,149 @@ def test_config_validation_messages(tmp_path: Path) -> None:
     with pytest.raises(ValueError) as excinfo:
         load_config(bad_path)
     assert "no valid categories" in str(excinfo.value)
+
+
+def test_feed_cache_round_trip(tmp_path: Path) -> None:
+    cache_path = tmp_path / "feed_cache.json"
+    published = datetime(2025, 1, 10, 8, 0, tzinfo=timezone.utc)
+    cache = {
+        "https://example.com/feed.rss": {
+            "etag": "\"abc\"",
+            "modified": None,
+            "entries": [
+                {
+                    "title": "Cached headline",
+                    "teaser": "",
+                    "link": "https://example.com/cached",
+                    "published": published.isoformat(),
+                }
+            ],
+        }
+    }
+    save_feed_cache(cache_path, cache)
+    loaded = load_feed_cache(cache_path)
+    assert loaded == cache
+
+    items = _items_from_cache(loaded["https://example.com/feed.rss"], "src", "world")
+    assert items == [
+        Item(
+            title="Cached headline",
+            teaser="",
+            link="https://example.com/cached",
+            published=published,
+            source="src",
+            category="world",
+        )
+    ]
+
+
+class _FakeResponse:
+    def __init__(self, url: str, status_code: int = 200, body: str = "", headers=None) -> None:
+        self.url = url
+        self.status_code = status_code
+        self.content = body.encode("utf-8")
+        self.headers = headers or {}
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error")
+
+
+def _rss(title: str, link: str, description: str = "") -> str:
+    return (
+        "<?xml version='1.0'?><rss version='2.0'><channel><title>t</title>"
+        f"<item><title>{title}</title><link>{link}</link>"
+        f"<description>{escape(description)}</description></item>"
+        "</channel></rss>"
+    )
+
+
+def test_fetch_resolves_relative_links_and_counts_failures(monkeypatch) -> None:
+    responses = {
+        "https://host.example/feed.rss": _FakeResponse(
+            "https://host.example/feed.rss", body=_rss("Relative", "/news/1")
+        ),
+        "https://host.example/missing.rss": _FakeResponse(
+            "https://host.example/missing.rss", status_code=500
+        ),
+    }
+
+    def fake_get(url, headers=None, timeout=None):
+        if url == "https://host.example/slow.rss":
+            raise requests.Timeout("timed out")
+        return responses[url]
+
+    monkeypatch.setattr(feeds._SESSION, "get", fake_get)
+    cfg = {
+        "sources": [
+            {"type": "rss", "url": "https://host.example/feed.rss"},
+            {"type": "rss", "url": "https://host.example/missing.rss"},
+            {"type": "rss", "url": "https://host.example/slow.rss"},
+        ]
+    }
+    items, stats = feeds.fetch_category_items("world", cfg)
+    assert [item.link for item in items] == ["https://host.example/news/1"]
+    assert stats == {"feeds_total": 3, "feeds_ok": 1, "feeds_failed": 2}
+
+
+def test_feed_cache_reused_on_not_modified(monkeypatch) -> None:
+    url = "https://host.example/feed.rss"
+    responses = [
+        _FakeResponse(url, body=_rss("Fresh headline", "https://host.example/1"), headers={"ETag": "e1"}),
+        _FakeResponse(url, status_code=304, headers={"ETag": "e1"}),
+        _FakeResponse(url, body=_rss("Changed headline", "https://host.example/2")),
+    ]
+    sent_headers = []
+
+    def fake_get(url, headers=None, timeout=None):
+        sent_headers.append(headers)
+        return responses.pop(0)
+
+    monkeypatch.setattr(feeds._SESSION, "get", fake_get)
+    cfg = {"sources": [{"type": "rss", "url": url, "name": "src"}]}
+    cache: dict = {}
+
+    items, _ = feeds.fetch_category_items("world", cfg, cache)
+    assert [item.title for item in items] == ["Fresh headline"]
+    assert cache[url]["etag"] == "e1"
+
+    items, stats = feeds.fetch_category_items("world", cfg, cache)
+    assert sent_headers[1] == {"If-None-Match": "e1"}
+    assert [item.title for item in items] == ["Fresh headline"]
+    assert stats["feeds_ok"] == 1
+
+    items, _ = feeds.fetch_category_items("world", cfg, cache)
+    assert [item.title for item in items] == ["Changed headline"]
+    assert url not in cache
+
+
+def test_feed_cache_skips_malformed_entries(tmp_path: Path) -> None:
+    record = {
+        "etag": "e1",
+        "modified": None,
+        "entries": [
+            {"title": None, "teaser": "", "link": "https://example.com/a"},
+            {"title": "Kept", "teaser": None, "link": "https://example.com/b"},
+        ],
+    }
+    items = _items_from_cache(record, None, "world")
+    assert [(item.title, item.teaser) for item in items] == [("Kept", "")]
+
+    cache_path = tmp_path / "feed_cache.json"
+    cache_path.write_bytes(b"\xff\xfe not utf-8")
+    assert load_feed_cache(cache_path) == {}
+
+    save_feed_cache(cache_path, {"u": {"etag": 1, "modified": ["x"], "entries": []}})
+    assert load_feed_cache(cache_path) == {"u": {"etag": None, "modified": None, "entries": []}}
+
+
+def test_fetch_drops_script_and_style_bodies(monkeypatch) -> None:
+    url = "https://host.example/feed.rss"
+    body = _rss(
+        "Styled",
+        "https://host.example/1",
+        "<style>.x{color:red}</style><script>track()</script>Hello <b>world</b>",
+    )
+    monkeypatch.setattr(feeds._SESSION, "get", lambda *args, **kwargs: _FakeResponse(url, body=body))
+    items, _ = feeds.fetch_category_items("world", {"sources": [{"type": "rss", "url": url}]})
+    assert [item.teaser for item in items] == ["Hello world"]